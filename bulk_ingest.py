@@ -0,0 +1,458 @@
+"""
+Bulk resume ingestion.
+
+Extracts text and sections from every PDF in a ZIP archive or directory using a
+process pool, deduplicates by content hash and stores the results in SQLite,
+ready for batch matching. Runs are resumable: sources already stored from the
+same input are skipped, and failed sources are retried.
+
+Usage:
+    python bulk_ingest.py resumes.zip --store resumes.db
+    python bulk_ingest.py ./cvs --store resumes.db --export-jsonl resumes.jsonl
+"""
+import argparse
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import sqlite3
+import sys
+import time
+import zipfile
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, ALL_COMPLETED, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+from resume_parsing import extract_pdf_text, split_resume_sections
+
+logger = logging.getLogger(__name__)
+
+# Files larger than this are skipped, bounding per-worker memory
+MAX_RESUME_BYTES = 10 * 1024 * 1024
+
+# Number of results written between commits
+COMMIT_INTERVAL = 50
+
+# Read buffer used when hashing sources
+HASH_CHUNK_SIZE = 64 * 1024
+
+# Open ZIP archives, keyed by (pid, path) so worker processes never share a handle
+open_archives = {}
+
+def open_store(store_path):
+    """Open the SQLite store, creating its tables if needed."""
+    conn = sqlite3.connect(store_path, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS resumes (
+            content_hash TEXT PRIMARY KEY,
+            source TEXT NOT NULL,
+            resume_text TEXT NOT NULL,
+            sections TEXT NOT NULL,
+            created_at REAL NOT NULL
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS sources (
+            source TEXT PRIMARY KEY,
+            content_hash TEXT,
+            status TEXT NOT NULL,
+            error TEXT
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS ingestions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            input TEXT NOT NULL,
+            status TEXT NOT NULL,
+            total INTEGER,
+            done INTEGER NOT NULL DEFAULT 0,
+            error TEXT,
+            created_at REAL NOT NULL,
+            finished_at REAL
+        )
+    """)
+    conn.commit()
+    return conn
+
+def create_job(store_path, input_name):
+    """Record a queued ingestion and return its id."""
+    conn = open_store(store_path)
+    try:
+        cursor = conn.execute(
+            "INSERT INTO ingestions (input, status, created_at) VALUES (?, 'queued', ?)",
+            (input_name, time.time()),
+        )
+        conn.commit()
+        return cursor.lastrowid
+    finally:
+        conn.close()
+
+def fail_interrupted_jobs(store_path):
+    """
+    Mark jobs left queued or running by a process that has since stopped as failed.
+
+    Returns the number of jobs marked. Re-running the same input resumes its work.
+    """
+    if not os.path.exists(store_path):
+        return 0
+
+    conn = open_store(store_path)
+    try:
+        cursor = conn.execute(
+            "UPDATE ingestions SET status = 'failed', error = ?, finished_at = ? WHERE status IN ('queued', 'running')",
+            ("Interrupted before finishing; re-upload the archive to resume", time.time()),
+        )
+        conn.commit()
+        return cursor.rowcount
+    finally:
+        conn.close()
+
+def hash_stream(f):
+    """Compute the SHA-256 of a file object without loading it into memory."""
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+def input_key(input_path):
+    """
+    Identify an input so its sources never collide with another input's.
+
+    A ZIP archive is identified by its name and content hash, so only the same
+    archive matches on a rerun. A directory is identified by its absolute path.
+    """
+    if os.path.isdir(input_path):
+        return os.path.realpath(input_path)
+
+    with open(input_path, "rb") as f:
+        return f"{os.path.basename(input_path)}@{hash_stream(f)}"
+
+def list_sources(input_path):
+    """Yield (name, member, size) for every PDF in a ZIP archive or directory."""
+    if zipfile.is_zipfile(input_path):
+        with zipfile.ZipFile(input_path) as archive:
+            for info in archive.infolist():
+                if info.is_dir() or not info.filename.lower().endswith(".pdf"):
+                    continue
+                yield info.filename, info.filename, info.file_size
+    elif os.path.isdir(input_path):
+        for root, dirs, files in os.walk(input_path):
+            dirs.sort()
+            for name in sorted(files):
+                if not name.lower().endswith(".pdf"):
+                    continue
+                path = os.path.join(root, name)
+                yield os.path.relpath(path, input_path), path, os.path.getsize(path)
+    else:
+        raise ValueError(f"{input_path} is not a ZIP archive or directory")
+
+def open_source(input_path, member):
+    """Open a source for reading, from the archive if input_path is a ZIP."""
+    if os.path.isdir(input_path):
+        return open(member, "rb")
+
+    key = (os.getpid(), input_path)
+    archive = open_archives.get(key)
+    if archive is None:
+        archive = zipfile.ZipFile(input_path)
+        open_archives[key] = archive
+    return archive.open(member)
+
+def hash_source(input_path, member):
+    """Compute the SHA-256 of a source without loading it into memory."""
+    with open_source(input_path, member) as f:
+        return hash_stream(f)
+
+def extract_source(input_path, member):
+    """Extract text and sections from one source. Runs in a worker process."""
+    with open_source(input_path, member) as f:
+        file_content = f.read(MAX_RESUME_BYTES + 1)
+    if len(file_content) > MAX_RESUME_BYTES:
+        raise ValueError(f"PDF file is larger than {MAX_RESUME_BYTES} bytes")
+
+    resume_text = extract_pdf_text(file_content)
+    return resume_text, split_resume_sections(resume_text)
+
+def ingest(input_path, store_path, workers=None, progress=None, job_id=None):
+    """
+    Ingest every PDF in a ZIP archive or directory into the store.
+
+    Sources are keyed by the input they came from, and a source already stored
+    with the same content is skipped, so an interrupted run can simply be
+    restarted; failed sources are retried. At most two tasks per worker are in
+    flight at once. If a worker crashes, the sources that were in flight are
+    retried one at a time so only the file that crashed it is marked failed.
+    `progress`, if given, is called as progress(done, total) after each source.
+
+    The run is tracked in the ingestions table under `job_id`, or a new job if
+    none is given, with its status, progress and any error.
+
+    Returns a dict of counts by status.
+    """
+    workers = workers or os.cpu_count() or 1
+    if job_id is None:
+        job_id = create_job(store_path, os.path.basename(os.path.abspath(input_path)))
+    conn = open_store(store_path)
+    counts = {"extracted": 0, "duplicate": 0, "failed": 0, "skipped": 0}
+
+    total = None
+    done = 0
+    uncommitted = 0
+    executor = None
+
+    # In-flight futures, mapped to (source, member, content_hash)
+    pending = {}
+    # Sources whose content is being extracted for another source, keyed by content hash
+    waiting = {}
+    # Sources that were in flight when a worker crashed
+    suspects = []
+
+    def record(source, content_hash, status, error=None):
+        conn.execute(
+            "INSERT OR REPLACE INTO sources (source, content_hash, status, error) VALUES (?, ?, ?, ?)",
+            (source, content_hash, status, error),
+        )
+        counts[status] += 1
+        advance()
+
+    def advance():
+        nonlocal done, uncommitted
+        done += 1
+        uncommitted += 1
+        if uncommitted >= COMMIT_INTERVAL:
+            commit()
+        if progress:
+            progress(done, total)
+
+    def commit():
+        # Commit before any blocking wait so the write lock is never held while idle
+        nonlocal uncommitted
+        conn.execute("UPDATE ingestions SET done = ? WHERE id = ?", (done, job_id))
+        conn.commit()
+        uncommitted = 0
+
+    def resolve(source, content_hash, status, error=None):
+        # Sources with the same content share the outcome of its extraction
+        record(source, content_hash, status, error)
+        for duplicate in waiting.pop(content_hash, []):
+            record(duplicate, content_hash, "failed" if status == "failed" else "duplicate", error)
+
+    def store(source, content_hash, result):
+        resume_text, sections = result
+        cursor = conn.execute(
+            "INSERT OR IGNORE INTO resumes (content_hash, source, resume_text, sections, created_at) VALUES (?, ?, ?, ?, ?)",
+            (content_hash, source, resume_text, json.dumps(sections), time.time()),
+        )
+        resolve(source, content_hash, "extracted" if cursor.rowcount else "duplicate")
+
+    def restart_executor():
+        nonlocal executor
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+        # Spawn rather than fork so workers never inherit the API's threads or open handles. Spawned
+        # workers do re-import the parent's __main__ module: under `uvicorn main:app` that is uvicorn,
+        # but under `python main.py` each worker re-runs main.py's module-level setup (Groq client,
+        # app, executor). That setup has no side effects outside the server's startup hook.
+        executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+    def collect(finished):
+        for future in finished:
+            source, member, content_hash = pending.pop(future)
+            try:
+                result = future.result()
+            except BrokenProcessPool:
+                # Any in-flight source may have crashed the worker, so it is retried on its own
+                suspects.append((source, member, content_hash))
+                continue
+            except Exception as e:
+                logger.warning(f"Failed to extract {source}: {e}")
+                resolve(source, content_hash, "failed", str(e))
+                continue
+            store(source, content_hash, result)
+
+    def recover():
+        # Every future still pending has failed with the broken pool
+        commit()
+        wait(pending)
+        collect(list(pending))
+        restart_executor()
+
+        while suspects:
+            source, member, content_hash = suspects.pop(0)
+            commit()
+            try:
+                result = executor.submit(extract_source, input_path, member).result()
+            except BrokenProcessPool:
+                logger.warning(f"Worker crashed while extracting {source}")
+                resolve(source, content_hash, "failed", "Worker process crashed while extracting this file")
+                restart_executor()
+                continue
+            except Exception as e:
+                logger.warning(f"Failed to extract {source}: {e}")
+                resolve(source, content_hash, "failed", str(e))
+                continue
+            store(source, content_hash, result)
+
+    def submit(source, member, content_hash):
+        try:
+            future = executor.submit(extract_source, input_path, member)
+        except BrokenProcessPool:
+            recover()
+            future = executor.submit(extract_source, input_path, member)
+        pending[future] = (source, member, content_hash)
+        waiting[content_hash] = []
+
+    def collect_some(return_when):
+        commit()
+        finished, _ = wait(pending, return_when=return_when)
+        collect(finished)
+        if suspects:
+            recover()
+
+    try:
+        total = sum(1 for _ in list_sources(input_path))
+        input_id = input_key(input_path)
+        conn.execute("UPDATE ingestions SET status = 'running', total = ? WHERE id = ?", (total, job_id))
+        conn.commit()
+
+        restart_executor()
+
+        for name, member, size in list_sources(input_path):
+            source = f"{input_id}/{name}"
+
+            if size > MAX_RESUME_BYTES:
+                record(source, None, "failed", f"PDF file is larger than {MAX_RESUME_BYTES} bytes")
+                continue
+
+            try:
+                content_hash = hash_source(input_path, member)
+            except Exception as e:
+                logger.warning(f"Failed to read {source}: {e}")
+                record(source, None, "failed", str(e))
+                continue
+
+            # Skip sources already stored with the same content by an earlier run
+            if conn.execute(
+                "SELECT 1 FROM sources WHERE source = ? AND content_hash = ? AND status != 'failed'",
+                (source, content_hash),
+            ).fetchone():
+                counts["skipped"] += 1
+                advance()
+                continue
+
+            # Content being extracted for another source is recorded once that finishes
+            if content_hash in waiting:
+                waiting[content_hash].append(source)
+                continue
+
+            if conn.execute("SELECT 1 FROM resumes WHERE content_hash = ?", (content_hash,)).fetchone():
+                record(source, content_hash, "duplicate")
+                continue
+
+            submit(source, member, content_hash)
+
+            # Bound the number of in-flight tasks so memory does not grow with the archive
+            if len(pending) >= workers * 2:
+                collect_some(FIRST_COMPLETED)
+
+        collect_some(ALL_COMPLETED)
+        job_status, job_error = "done", None
+    except BaseException as e:
+        job_status, job_error = "failed", str(e) or type(e).__name__
+        raise
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+        conn.execute(
+            "UPDATE ingestions SET status = ?, done = ?, error = ?, finished_at = ? WHERE id = ?",
+            (job_status, done, job_error, time.time(), job_id),
+        )
+        conn.commit()
+        conn.close()
+        for key in [key for key in open_archives if key[0] == os.getpid()]:
+            open_archives.pop(key).close()
+
+    return counts
+
+def store_status(store_path, job_limit=20):
+    """Return counts of ingested sources by status and the most recent ingestion jobs."""
+    counts = {"extracted": 0, "duplicate": 0, "failed": 0, "unique_resumes": 0}
+    if not os.path.exists(store_path):
+        return {"counts": counts, "jobs": []}
+
+    # Open read-only so a status check never creates or migrates the store
+    conn = sqlite3.connect(f"{Path(os.path.abspath(store_path)).as_uri()}?mode=ro", uri=True, timeout=30)
+    try:
+        rows = conn.execute("SELECT status, COUNT(*) FROM sources GROUP BY status").fetchall()
+        unique_resumes = conn.execute("SELECT COUNT(*) FROM resumes").fetchone()[0]
+        conn.row_factory = sqlite3.Row
+        jobs = conn.execute(
+            "SELECT id, input, status, total, done, error, created_at, finished_at FROM ingestions ORDER BY id DESC LIMIT ?",
+            (job_limit,),
+        ).fetchall()
+    finally:
+        conn.close()
+
+    counts.update(dict(rows))
+    counts["unique_resumes"] = unique_resumes
+    return {"counts": counts, "jobs": [dict(job) for job in jobs]}
+
+def export_jsonl(store_path, jsonl_path):
+    """Stream every stored resume to a JSONL file. Returns the number of rows written."""
+    conn = open_store(store_path)
+    written = 0
+    try:
+        with open(jsonl_path, "w", encoding="utf-8") as f:
+            rows = conn.execute(
+                "SELECT content_hash, source, resume_text, sections FROM resumes ORDER BY created_at"
+            )
+            for content_hash, source, resume_text, sections in rows:
+                record = {
+                    "content_hash": content_hash,
+                    "source": source,
+                    "resume_text": resume_text,
+                    "sections": json.loads(sections),
+                }
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                written += 1
+    finally:
+        conn.close()
+    return written
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk extract resumes from a ZIP archive or directory")
+    parser.add_argument("input_path", help="ZIP archive or directory of PDF resumes")
+    parser.add_argument("--store", default=os.getenv("BULK_STORE_PATH", "resumes.db"), help="SQLite store path")
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker processes (default: CPU count)")
+    parser.add_argument("--export-jsonl", help="Also write the store to this JSONL file")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+
+    def print_progress(done, total):
+        sys.stderr.write(f"\rProcessed {done}/{total}")
+        sys.stderr.flush()
+
+    try:
+        counts = ingest(args.input_path, args.store, workers=args.workers, progress=print_progress)
+    except ValueError as e:
+        logger.error(str(e))
+        return 1
+    except KeyboardInterrupt:
+        sys.stderr.write("\nInterrupted; rerun the same command to resume\n")
+        return 130
+    sys.stderr.write("\n")
+    logger.info(f"Ingestion finished: {counts}")
+
+    if args.export_jsonl:
+        written = export_jsonl(args.store, args.export_jsonl)
+        logger.info(f"Wrote {written} resumes to {args.export_jsonl}")
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
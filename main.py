@@ -10,13 +10,19 @@ import json
 import os
 import tempfile
 import logging
-from io import BytesIO
 from groq import Groq
-import fitz  # PyMuPDF
 from dotenv import load_dotenv
 import sys
 import importlib.util
 import time
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from bulk_ingest import create_job, fail_interrupted_jobs, ingest, store_status
+from resume_parsing import (
+    detect_changed_sections,
+    extract_pdf_text,
+    split_resume_sections,
+)
 
 # Load environment variables
 load_dotenv()
@@ -152,41 +158,75 @@ class ResumeJobMatchResponse(BaseModel):
     matched_resume: Dict[str, Any] = Field(..., description="The tailored resume matched to the job description")
     processing_time: float = Field(..., description="Time taken to process the request in seconds")
 
-# Helper functions
-def extract_resume_info(file_content):
-    """Extract text from a PDF resume."""
-    try:
-        # Validate file content
-        if not file_content or len(file_content) < 100:
-            raise ValueError("PDF file is too small or empty")
+class ResumeRematchInput(BaseModel):
+    matched_resume: Dict[str, Any] = Field(..., description="The tailored resume returned by a previous match")
+    resume_text: str = Field(..., description="The current resume text")
+    job_description: str = Field(..., description="The current job description text")
+    previous_resume_text: Optional[str] = Field(None, description="The resume text used for the previous match, if the resume changed")
+    previous_job_description: Optional[str] = Field(None, description="The job description used for the previous match, if the job changed")
 
-        # Create a BytesIO object from the file content
-        pdf_stream = BytesIO(file_content)
-
-        # Open the PDF from the BytesIO object
-        try:
-            doc = fitz.open(stream=pdf_stream, filetype="pdf")
-        except Exception as e:
-            logger.error(f"Error opening PDF: {e}")
-            raise ValueError(f"Invalid PDF file: {str(e)}")
+    @validator('resume_text')
+    def resume_text_not_empty(cls, v):
+        if not v or len(v.strip()) < 50:
+            raise ValueError('Resume text must not be empty and should contain meaningful content (at least 50 characters)')
+        return v
 
-        # Check if the document has pages
-        if doc.page_count == 0:
-            raise ValueError("PDF file has no pages")
+    @validator('job_description')
+    def job_description_not_empty(cls, v):
+        if not v or len(v.strip()) < 50:
+            raise ValueError('Job description must not be empty and should contain meaningful content (at least 50 characters)')
+        return v
 
-        # Extract text from all pages
-        text = ""
-        for page in doc:
-            text += page.get_text()
+    class Config:
+        schema_extra = {
+            "example": {
+                "matched_resume": {"firstName": "John", "skills": ["Python"], "matchMetrics": {}, "coverLetter": "..."},
+                "resume_text": "John Doe\nSoftware Engineer\nSkills\nPython, FastAPI, Docker...",
+                "job_description": "We are looking for a Software Engineer with experience in Python...",
+                "previous_resume_text": "John Doe\nSoftware Engineer\nSkills\nPython, FastAPI..."
+            }
+        }
 
-        # Close the document
-        doc.close()
+class ResumeRematchResponse(BaseModel):
+    matched_resume: Dict[str, Any] = Field(..., description="The updated tailored resume")
+    regenerated_sections: List[str] = Field(..., description="Keys of the matched resume that were regenerated")
+    processing_time: float = Field(..., description="Time taken to process the request in seconds")
 
-        # Validate extracted text
-        if not text or len(text.strip()) < 50:
-            raise ValueError("Could not extract meaningful text from the PDF (less than 50 characters)")
+class BulkIngestionJob(BaseModel):
+    id: int = Field(..., description="Ingestion job id")
+    input: str = Field(..., description="Name of the ingested archive or directory")
+    status: str = Field(..., description="One of queued, running, done or failed")
+    total: Optional[int] = Field(None, description="Number of PDF resumes in the input, once known")
+    done: int = Field(..., description="Number of PDF resumes processed so far")
+    error: Optional[str] = Field(None, description="Error that stopped the ingestion, if it failed")
+    created_at: float = Field(..., description="Time the job was queued, as a Unix timestamp")
+    finished_at: Optional[float] = Field(None, description="Time the job finished, as a Unix timestamp")
+
+class BulkIngestionStatusResponse(BaseModel):
+    counts: Dict[str, int] = Field(..., description="Counts of ingested resumes by status")
+    jobs: List[BulkIngestionJob] = Field(..., description="Most recent ingestion jobs, newest first")
+
+# Text before the first heading is treated as contact details
+CONTACT_FIELDS = ["firstName", "lastName", "headline", "location", "phoneNumber", "linkedin", "email", "github"]
+
+# Sections that are tailored to the job description and go stale when it changes
+JOB_DEPENDENT_FIELDS = ["jobAnalysis", "objective", "summary", "skills", "workExperience", "coverLetter"]
+
+# Tailored fields derived from the user's data as a whole, which go stale when a section they draw on changes
+SECTION_DEPENDENT_FIELDS = {
+    "workExperience": ["skills", "summary"],
+    "relevantProjects": ["skills", "summary"],
+    "certifications": ["skills", "summary"],
+    "skills": ["summary"],
+    "education": ["summary"],
+    "achievements": ["summary"],
+}
 
-        return text
+# Helper functions
+def extract_resume_info(file_content):
+    """Extract text from a PDF resume."""
+    try:
+        return extract_pdf_text(file_content)
     except ValueError as e:
         logger.error(f"Validation error in extract_resume_info: {e}")
         raise HTTPException(status_code=400, detail=str(e))
@@ -230,6 +270,54 @@ def extract_job_info(job_url):
         logger.error(f"Error extracting job info: {e}")
         raise HTTPException(status_code=500, detail=f"Error extracting job info: {str(e)}")
 
+def generate_json(prompt):
+    """Send a prompt to Groq and parse the completion as JSON."""
+    # Call Groq with timeout handling
+    try:
+        chat_completion = client.chat.completions.create(
+            messages=[
+                {
+                    "role": "user",
+                    "content": prompt,
+                }
+            ],
+            model=os.getenv("MODEL_NAME", "llama-3.3-70b-versatile"),
+            timeout=60,  # 60 second timeout
+        )
+    except Exception as e:
+        logger.error(f"Error calling Groq API: {e}")
+        raise HTTPException(
+            status_code=503,
+            detail=f"Error communicating with AI service: {str(e)}. Please try again later."
+        )
+
+    # Extract and parse output
+    try:
+        response_text = chat_completion.choices[0].message.content
+        response_json = json.loads(response_text)
+    except json.JSONDecodeError as e:
+        logger.error(f"Error parsing JSON response: {e}")
+        logger.error(f"Raw response: {chat_completion.choices[0].message.content}")
+
+        # Try to clean the response and parse again
+        cleaned_response = response_text.strip()
+        if cleaned_response.startswith("```json"):
+            cleaned_response = cleaned_response.replace("```json", "", 1)
+        if cleaned_response.endswith("```"):
+            cleaned_response = cleaned_response[:-3]
+
+        cleaned_response = cleaned_response.strip()
+
+        try:
+            response_json = json.loads(cleaned_response)
+        except json.JSONDecodeError:
+            raise HTTPException(
+                status_code=500,
+                detail="The AI generated an invalid JSON response. Please try again."
+            )
+
+    return response_json
+
 def match_user_job(user_info, job_info):
     """Match user resume to job description."""
     start_time = time.time()
@@ -255,70 +343,147 @@ def match_user_job(user_info, job_info):
         Resume MUST strictly be in this format, {example}. No changes to the example format since there will be a database used to store the JSON data.
         """
 
-        # Use Groq to match resume to job with timeout handling
-        try:
-            chat_completion = client.chat.completions.create(
-                messages=[
-                    {
-                        "role": "user",
-                        "content": prompt_user_job,
-                    }
-                ],
-                model=os.getenv("MODEL_NAME", "llama-3.3-70b-versatile"),
-                timeout=60,  # 60 second timeout
-            )
-        except Exception as e:
-            logger.error(f"Error calling Groq API: {e}")
-            raise HTTPException(
-                status_code=503,
-                detail=f"Error communicating with AI service: {str(e)}. Please try again later."
-            )
+        # Use Groq to match resume to job
+        user_job_info = generate_json(prompt_user_job)
 
-        # Extract and parse output
-        try:
-            user_job_info_text = chat_completion.choices[0].message.content
-            user_job_info = json.loads(user_job_info_text)
-        except json.JSONDecodeError as e:
-            logger.error(f"Error parsing JSON response: {e}")
-            logger.error(f"Raw response: {chat_completion.choices[0].message.content}")
-
-            # Try to clean the response and parse again
-            cleaned_response = user_job_info_text.strip()
-            if cleaned_response.startswith("```json"):
-                cleaned_response = cleaned_response.replace("```json", "", 1)
-            if cleaned_response.endswith("```"):
-                cleaned_response = cleaned_response[:-3]
-
-            cleaned_response = cleaned_response.strip()
-
-            try:
-                user_job_info = json.loads(cleaned_response)
-            except json.JSONDecodeError:
+        # Calculate processing time
+        processing_time = time.time() - start_time
+
+        # Return both the matched resume and the processing time
+        return {
+            "matched_resume": user_job_info,
+            "processing_time": round(processing_time, 2)
+        }
+
+    except ValueError as e:
+        logger.error(f"Validation error: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error matching user to job: {e}")
+        raise HTTPException(status_code=500, detail=f"Error matching user to job: {str(e)}")
+
+def rematch_user_job(matched_resume, resume_text, job_description,
+                     previous_resume_text=None, previous_job_description=None):
+    """Update a matched resume by regenerating only the sections affected by an edit."""
+    start_time = time.time()
+
+    try:
+        # Validate inputs
+        if not matched_resume:
+            raise ValueError("Previous matched resume is empty")
+
+        if previous_resume_text is None and previous_job_description is None:
+            raise ValueError("Provide previous_resume_text and/or previous_job_description to detect changes")
+
+        job_changed = (
+            previous_job_description is not None
+            and " ".join(previous_job_description.split()) != " ".join(job_description.split())
+        )
+
+        changed_sections = []
+        if previous_resume_text is not None:
+            changed_sections = detect_changed_sections(previous_resume_text, resume_text)
+
+        # Fall back to a full match if the resume edit cannot be localized
+        if changed_sections is None:
+            logger.info("Could not localize resume changes, running a full match")
+            result = match_user_job(resume_text, job_description)
+            if not isinstance(result["matched_resume"], dict):
                 raise HTTPException(
                     status_code=500,
                     detail="The AI generated an invalid JSON response. Please try again."
                 )
+            result["regenerated_sections"] = list(result["matched_resume"].keys())
+            return result
+
+        # Work out which matched resume keys need regenerating
+        fields = []
+        for section in changed_sections:
+            fields.extend(CONTACT_FIELDS if section == "contact" else [section])
+            fields.extend(SECTION_DEPENDENT_FIELDS.get(section, []))
+        if job_changed:
+            fields.extend(JOB_DEPENDENT_FIELDS)
+
+        if not fields:
+            return {
+                "matched_resume": matched_resume,
+                "regenerated_sections": [],
+                "processing_time": round(time.time() - start_time, 2)
+            }
+
+        fields.append("matchMetrics")
+        fields = list(dict.fromkeys(fields))
+
+        # Fields tailored from the whole resume need all of it, otherwise only the edited sections are sent
+        if job_changed or "skills" in fields or "summary" in fields:
+            resume_context = resume_text
+        else:
+            sections = split_resume_sections(resume_text)
+            resume_context = "\n\n".join(
+                f"{section}:\n{sections.get(section, '')}" for section in changed_sections
+            )
+
+        unchanged_resume = {
+            key: value for key, value in matched_resume.items()
+            if key not in fields and key != "coverLetter"
+        }
+        previous_fields = {key: matched_resume.get(key) for key in fields}
+
+        # Create prompt for regenerating the affected sections
+        prompt_rematch = fr"""
+        You are an API that strictly returns data in JSON.
+        A resume was previously tailored to a job description. The user information or job description has since changed.
+        Regenerate ONLY these keys of the tailored resume: {json.dumps(fields)}.
+        Updated user information:{resume_context}
+        Job description:{job_description}
+        The rest of the tailored resume, which must stay as it is:{json.dumps(unchanged_resume)}
+        Previous values of the keys to regenerate, showing their required format:{json.dumps(previous_fields)}
+        Follow the same rules as the original tailoring: only include skills that appear in both the job description and the user's data,
+        emphasize work experiences that reflect the job requirements, and recompute matchMetrics for the whole updated resume.
+        Do not include any other output. No markdown, no comments,
+        no code fences, no extra text — just a plain JSON object containing exactly the keys to regenerate, nothing to enclose it with.
+        """
+
+        # Use Groq to regenerate the affected sections
+        regenerated = generate_json(prompt_rematch)
+        if not isinstance(regenerated, dict):
+            raise HTTPException(
+                status_code=500,
+                detail="The AI generated an invalid JSON response. Please try again."
+            )
+
+        # A requested key left out would silently keep its stale value
+        missing_fields = [key for key in fields if key not in regenerated]
+        if missing_fields:
+            logger.error(f"AI response is missing regenerated keys: {missing_fields}")
+            raise HTTPException(
+                status_code=500,
+                detail="The AI generated an invalid JSON response. Please try again."
+            )
+
+        # Merge the regenerated sections into the previous resume
+        updated_resume = dict(matched_resume)
+        for key in fields:
+            updated_resume[key] = regenerated[key]
 
         # Calculate processing time
         processing_time = time.time() - start_time
 
-        # Return both the matched resume and the processing time
         return {
-            "matched_resume": user_job_info,
+            "matched_resume": updated_resume,
+            "regenerated_sections": fields,
             "processing_time": round(processing_time, 2)
         }
 
+    except HTTPException:
+        # Re-raise HTTP exceptions to preserve status code and detail
+        raise
     except ValueError as e:
         logger.error(f"Validation error: {e}")
         raise HTTPException(status_code=400, detail=str(e))
-    except json.JSONDecodeError as e:
-        logger.error(f"Error parsing JSON response: {e}")
-        if 'chat_completion' in locals():
-            logger.error(f"Raw response: {chat_completion.choices[0].message.content}")
-        raise HTTPException(status_code=500, detail=f"Error parsing AI response: {str(e)}")
     except Exception as e:
-        logger.error(f"Error matching user to job: {e}")
-        raise HTTPException(status_code=500, detail=f"Error matching user to job: {str(e)}")
+        logger.error(f"Error rematching user to job: {e}")
+        raise HTTPException(status_code=500, detail=f"Error rematching user to job: {str(e)}")
 
 # API endpoints
 @app.get("/")
@@ -360,6 +525,87 @@ async def extract_resume_endpoint(resume_file: UploadFile = File(...)):
         logger.error(f"Error in extract-resume endpoint: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+# Bulk ingestion store, and the directory uploaded archives wait in until they are ingested
+BULK_STORE_PATH = os.getenv("BULK_STORE_PATH", "resumes.db")
+BULK_UPLOAD_DIR = os.getenv("BULK_UPLOAD_DIR", os.path.join(tempfile.gettempdir(), "resume-matcher-uploads"))
+
+# Bulk ingestions run one at a time so they never compete for CPUs or the store's write lock
+bulk_ingestion_executor = ThreadPoolExecutor(max_workers=1)
+
+@app.on_event("startup")
+def recover_bulk_ingestions():
+    """Fail ingestions interrupted by a restart and remove their leftover uploads."""
+    try:
+        interrupted = fail_interrupted_jobs(BULK_STORE_PATH)
+        if interrupted:
+            logger.warning(f"Marked {interrupted} interrupted bulk ingestion(s) as failed")
+        shutil.rmtree(BULK_UPLOAD_DIR, ignore_errors=True)
+    except Exception as e:
+        logger.error(f"Error recovering interrupted bulk ingestions: {e}")
+
+def ingest_uploaded_archive(archive_path, store_path, job_id):
+    """Ingest an uploaded archive in the background, then remove it."""
+    try:
+        counts = ingest(archive_path, store_path, job_id=job_id)
+        logger.info(f"Bulk ingestion of {os.path.basename(archive_path)} finished: {counts}")
+    except Exception as e:
+        logger.error(f"Error in bulk ingestion of {os.path.basename(archive_path)}: {e}")
+    finally:
+        shutil.rmtree(os.path.dirname(archive_path), ignore_errors=True)
+
+@app.post("/bulk-extract-resumes", response_model=Dict[str, Any],
+         description="Extract text from a ZIP archive of resumes in the background")
+def bulk_extract_resumes_endpoint(
+    archive_file: UploadFile = File(..., description="ZIP archive of PDF resumes")
+):
+    """
+    Extract text from every PDF resume in a ZIP archive.
+
+    - Takes a ZIP archive of PDF resumes as input
+    - Queues the archive; ingestions run one at a time in the background using a process pool
+    - Extracts text and sections, skipping duplicate content
+    - Stores results in the SQLite store at BULK_STORE_PATH, ready for batch matching
+    - Re-uploading the same archive resumes an interrupted ingestion
+    - Returns a job id whose progress is reported by /bulk-extract-resumes/status
+    """
+    # A plain def endpoint runs in the threadpool, so copying a large archive never blocks the event loop
+    upload_dir = None
+    try:
+        # Check file type
+        if not archive_file.filename.lower().endswith('.zip'):
+            raise HTTPException(status_code=400, detail="Only ZIP archives are supported")
+
+        # Save the archive under its own name, which is kept in the stored source keys
+        os.makedirs(BULK_UPLOAD_DIR, exist_ok=True)
+        upload_dir = tempfile.mkdtemp(dir=BULK_UPLOAD_DIR)
+        archive_path = os.path.join(upload_dir, os.path.basename(archive_file.filename))
+        with open(archive_path, "wb") as f:
+            shutil.copyfileobj(archive_file.file, f)
+
+        archive_name = os.path.basename(archive_path)
+        job_id = create_job(BULK_STORE_PATH, archive_name)
+        bulk_ingestion_executor.submit(ingest_uploaded_archive, archive_path, BULK_STORE_PATH, job_id)
+
+        return {"job_id": job_id, "status": "queued", "archive": archive_name}
+    except HTTPException:
+        # Re-raise HTTP exceptions to preserve status code and detail
+        raise
+    except Exception as e:
+        logger.error(f"Error in bulk-extract-resumes endpoint: {e}")
+        if upload_dir:
+            shutil.rmtree(upload_dir, ignore_errors=True)
+        raise HTTPException(status_code=500, detail=f"An unexpected error occurred: {str(e)}")
+
+@app.get("/bulk-extract-resumes/status", response_model=BulkIngestionStatusResponse,
+        description="Get bulk extraction progress and counts of processed resumes")
+def bulk_extract_resumes_status():
+    """Get counts of bulk-extracted resumes by status and the progress of recent ingestion jobs."""
+    try:
+        return store_status(BULK_STORE_PATH)
+    except Exception as e:
+        logger.error(f"Error in bulk-extract-resumes status endpoint: {e}")
+        raise HTTPException(status_code=500, detail=f"An unexpected error occurred: {str(e)}")
+
 @app.post("/match", response_model=ResumeJobMatchResponse,
          description="Match a resume to a job description and generate a tailored resume")
 async def match_endpoint(match_input: ResumeJobMatchInput):
@@ -421,6 +667,34 @@ async def match_from_url_and_file(
         logger.error(f"Error in match-from-url-and-file endpoint: {e}")
         raise HTTPException(status_code=500, detail=f"An unexpected error occurred: {str(e)}")
 
+@app.post("/rematch", response_model=ResumeRematchResponse,
+         description="Update a previously tailored resume after the resume or job description changes")
+async def rematch_endpoint(rematch_input: ResumeRematchInput):
+    """
+    Update a previously tailored resume after an edit.
+
+    - Takes the previous matched resume, the current resume and job texts, and the previous versions of whichever changed
+    - Detects which resume sections are affected by the change
+    - Regenerates only those sections and the match metrics, reusing everything else
+    - Falls back to a full match if the resume has no recognizable section headings
+    """
+    try:
+        result = rematch_user_job(
+            rematch_input.matched_resume,
+            rematch_input.resume_text,
+            rematch_input.job_description,
+            previous_resume_text=rematch_input.previous_resume_text,
+            previous_job_description=rematch_input.previous_job_description,
+        )
+
+        return result
+    except HTTPException:
+        # Re-raise HTTP exceptions to preserve status code and detail
+        raise
+    except Exception as e:
+        logger.error(f"Error in rematch endpoint: {e}")
+        raise HTTPException(status_code=500, detail=f"An unexpected error occurred: {str(e)}")
+
 # Add a new endpoint for handling job description string from scraper
 class ScrapedJobInput(BaseModel):
     job_description: str = Field(..., description="The job description text scraped from a website")
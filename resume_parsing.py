@@ -0,0 +1,120 @@
+import logging
+from io import BytesIO
+import fitz  # PyMuPDF
+
+logger = logging.getLogger(__name__)
+
+# Resume section headings, mapped to the matched resume keys they feed
+RESUME_SECTION_HEADINGS = {
+    "summary": ["summary", "professional summary", "profile", "about me"],
+    "objective": ["objective", "career objective"],
+    "education": ["education", "academic background"],
+    "workExperience": ["experience", "work experience", "professional experience", "employment", "employment history", "work history"],
+    "skills": ["skills", "technical skills", "core competencies"],
+    "certifications": ["certifications", "certificates", "licenses and certifications"],
+    "achievements": ["achievements", "awards", "honors", "honors and awards"],
+    "relevantProjects": ["projects", "relevant projects", "personal projects"],
+    "references": ["references"],
+}
+# Headings with no matched resume field; their text is grouped under "other"
+OTHER_SECTION_HEADINGS = [
+    "volunteer work", "volunteer experience", "volunteering", "languages", "interests", "hobbies",
+    "publications", "activities", "extracurricular activities", "leadership", "courses", "training",
+    "memberships", "professional memberships", "affiliations", "conferences", "patents",
+]
+RESUME_HEADING_LOOKUP = {
+    heading: section
+    for section, headings in RESUME_SECTION_HEADINGS.items()
+    for heading in headings
+}
+RESUME_HEADING_LOOKUP.update({heading: "other" for heading in OTHER_SECTION_HEADINGS})
+
+def extract_pdf_text(file_content):
+    """
+    Extract text from PDF bytes.
+
+    Raises ValueError if the file is not a readable PDF or has no meaningful text.
+    """
+    # Validate file content
+    if not file_content or len(file_content) < 100:
+        raise ValueError("PDF file is too small or empty")
+
+    # Create a BytesIO object from the file content
+    pdf_stream = BytesIO(file_content)
+
+    # Open the PDF from the BytesIO object
+    try:
+        doc = fitz.open(stream=pdf_stream, filetype="pdf")
+    except Exception as e:
+        logger.error(f"Error opening PDF: {e}")
+        raise ValueError(f"Invalid PDF file: {str(e)}")
+
+    try:
+        # Check if the document has pages
+        if doc.page_count == 0:
+            raise ValueError("PDF file has no pages")
+
+        # Extract text from all pages
+        text = "".join(page.get_text() for page in doc)
+    finally:
+        # Close the document
+        doc.close()
+
+    # Validate extracted text
+    if not text or len(text.strip()) < 50:
+        raise ValueError("Could not extract meaningful text from the PDF (less than 50 characters)")
+
+    return text
+
+def split_resume_sections(resume_text):
+    """
+    Split resume text into sections keyed by matched resume field.
+
+    Text before the first heading is keyed "contact", and text under headings
+    listed in OTHER_SECTION_HEADINGS is keyed "other". Any other line, however it
+    is formatted, stays in the current section.
+    """
+    sections = {"contact": []}
+    current = "contact"
+
+    for line in resume_text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+
+        heading = line.lower().rstrip(":").strip()
+        if heading in RESUME_HEADING_LOOKUP:
+            current = RESUME_HEADING_LOOKUP[heading]
+            sections.setdefault(current, [])
+            continue
+
+        # Collapse whitespace so PDF reflow alone does not count as an edit
+        sections.setdefault(current, []).append(" ".join(line.split()))
+
+    return {section: "\n".join(lines) for section, lines in sections.items()}
+
+def detect_changed_sections(previous_resume_text, resume_text):
+    """
+    Return the resume sections that differ between two resume texts.
+
+    Returns None if the change cannot be localized: the resume has no
+    recognizable section headings, or the edit is under a heading with no
+    matched resume field.
+    """
+    previous_sections = split_resume_sections(previous_resume_text)
+    sections = split_resume_sections(resume_text)
+
+    if previous_sections == sections:
+        return []
+
+    if len(previous_sections) == 1 and len(sections) == 1:
+        return None
+
+    if previous_sections.get("other", "") != sections.get("other", ""):
+        return None
+
+    return [
+        section
+        for section in list(RESUME_SECTION_HEADINGS) + ["contact"]
+        if previous_sections.get(section, "") != sections.get(section, "")
+    ]
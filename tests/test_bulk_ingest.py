@@ -0,0 +1,190 @@
+import json
+import os
+import sqlite3
+import zipfile
+
+import fitz  # PyMuPDF
+import pytest
+
+import bulk_ingest
+import crash_helpers
+
+
+def make_pdf(name):
+    """Build a one-page resume PDF whose text is unique to `name`."""
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text(
+        (72, 72),
+        f"{name}\nExperience\nSoftware Engineer at Acme, building Python services\nSkills\nPython, SQL",
+    )
+    content = doc.tobytes()
+    doc.close()
+    return content
+
+
+def make_zip(path, files):
+    with zipfile.ZipFile(path, "w") as archive:
+        for name, content in files.items():
+            archive.writestr(name, content)
+    return str(path)
+
+
+def source_statuses(store_path):
+    conn = sqlite3.connect(store_path)
+    try:
+        rows = conn.execute("SELECT source, status, error FROM sources").fetchall()
+    finally:
+        conn.close()
+    return {os.path.basename(source): (status, error) for source, status, error in rows}
+
+
+@pytest.fixture
+def store_path(tmp_path):
+    return str(tmp_path / "resumes.db")
+
+
+@pytest.fixture
+def archive_path(tmp_path):
+    alice = make_pdf("Alice Mensah")
+    return make_zip(tmp_path / "resumes.zip", {
+        "alice.pdf": alice,
+        "bob.pdf": make_pdf("Bob Owusu"),
+        "nested/alice-copy.pdf": alice,
+        "broken.pdf": b"not a pdf" * 20,
+        "notes.txt": b"ignored",
+    })
+
+
+def test_ingest_extracts_deduplicates_and_records_failures(archive_path, store_path):
+    counts = bulk_ingest.ingest(archive_path, store_path, workers=2)
+
+    assert counts == {"extracted": 2, "duplicate": 1, "failed": 1, "skipped": 0}
+    statuses = source_statuses(store_path)
+    assert statuses["alice.pdf"][0] == "extracted"
+    assert statuses["alice-copy.pdf"][0] == "duplicate"
+    assert statuses["broken.pdf"][0] == "failed"
+    assert "notes.txt" not in statuses
+
+    conn = sqlite3.connect(store_path)
+    sections = [json.loads(row[0]) for row in conn.execute("SELECT sections FROM resumes")]
+    conn.close()
+    assert all("Acme" in resume_sections["workExperience"] for resume_sections in sections)
+
+
+def test_rerun_skips_stored_sources_and_retries_failures(archive_path, store_path):
+    bulk_ingest.ingest(archive_path, store_path, workers=2)
+
+    counts = bulk_ingest.ingest(archive_path, store_path, workers=2)
+
+    assert counts == {"extracted": 0, "duplicate": 0, "failed": 1, "skipped": 3}
+
+
+def test_duplicates_in_flight_share_the_outcome(tmp_path, store_path):
+    alice = make_pdf("Alice Mensah")
+    files = {f"copy{i}.pdf": alice for i in range(6)}
+    archive = make_zip(tmp_path / "copies.zip", files)
+
+    counts = bulk_ingest.ingest(archive, store_path, workers=3)
+
+    assert counts == {"extracted": 1, "duplicate": 5, "failed": 0, "skipped": 0}
+
+
+def test_inputs_with_the_same_file_names_do_not_collide(tmp_path, store_path):
+    for name in ("agency-a", "agency-b"):
+        (tmp_path / name).mkdir()
+        (tmp_path / name / "cv.pdf").write_bytes(make_pdf(name))
+
+    first = bulk_ingest.ingest(str(tmp_path / "agency-a"), store_path, workers=1)
+    second = bulk_ingest.ingest(str(tmp_path / "agency-b"), store_path, workers=1)
+
+    assert first["extracted"] == 1
+    assert second["extracted"] == 1
+    assert bulk_ingest.store_status(store_path)["counts"]["unique_resumes"] == 2
+
+
+def test_archives_with_the_same_name_do_not_collide(tmp_path, store_path):
+    (tmp_path / "a").mkdir()
+    (tmp_path / "b").mkdir()
+    first = make_zip(tmp_path / "a" / "resumes.zip", {"cv.pdf": make_pdf("Alice Mensah")})
+    second = make_zip(tmp_path / "b" / "resumes.zip", {"cv.pdf": make_pdf("Bob Owusu")})
+
+    bulk_ingest.ingest(first, store_path, workers=1)
+    counts = bulk_ingest.ingest(second, store_path, workers=1)
+
+    assert counts["extracted"] == 1
+    assert counts["skipped"] == 0
+
+
+def test_worker_crash_only_fails_the_crashing_file(tmp_path, store_path, monkeypatch):
+    monkeypatch.setattr(bulk_ingest, "extract_source", crash_helpers.extract_or_crash)
+    crash = make_pdf("Crash Case")
+    files = {f"cv{i}.pdf": make_pdf(f"Candidate {i}") for i in range(6)}
+    files["crash.pdf"] = crash
+    files["crash-copy.pdf"] = crash
+    archive = make_zip(tmp_path / "resumes.zip", files)
+
+    counts = bulk_ingest.ingest(archive, store_path, workers=2)
+
+    assert counts == {"extracted": 6, "duplicate": 0, "failed": 2, "skipped": 0}
+    statuses = source_statuses(store_path)
+    assert all(statuses[f"cv{i}.pdf"][0] == "extracted" for i in range(6))
+    assert statuses["crash.pdf"] == ("failed", "Worker process crashed while extracting this file")
+    assert statuses["crash-copy.pdf"][0] == "failed"
+
+
+def test_interrupted_run_resumes(tmp_path, store_path):
+    files = {f"cv{i}.pdf": make_pdf(f"Candidate {i}") for i in range(8)}
+    archive = make_zip(tmp_path / "resumes.zip", files)
+
+    def interrupt(done, total):
+        if done == 3:
+            raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        bulk_ingest.ingest(archive, store_path, workers=1, progress=interrupt)
+    assert bulk_ingest.store_status(store_path)["jobs"][0]["status"] == "failed"
+
+    counts = bulk_ingest.ingest(archive, store_path, workers=2)
+
+    assert counts["skipped"] >= 3
+    assert counts["skipped"] + counts["extracted"] == 8
+    assert bulk_ingest.store_status(store_path)["counts"]["unique_resumes"] == 8
+
+
+def test_invalid_input_fails_its_job(tmp_path, store_path):
+    with pytest.raises(ValueError):
+        bulk_ingest.ingest(str(tmp_path / "missing.zip"), store_path)
+
+    job = bulk_ingest.store_status(store_path)["jobs"][0]
+    assert job["status"] == "failed"
+    assert "not a ZIP archive or directory" in job["error"]
+
+
+def test_export_jsonl(archive_path, store_path, tmp_path):
+    bulk_ingest.ingest(archive_path, store_path, workers=2)
+    jsonl_path = tmp_path / "resumes.jsonl"
+
+    written = bulk_ingest.export_jsonl(store_path, str(jsonl_path))
+
+    records = [json.loads(line) for line in jsonl_path.read_text(encoding="utf-8").splitlines()]
+    assert written == len(records) == 2
+    assert {"content_hash", "source", "resume_text", "sections"} <= set(records[0])
+
+
+def test_store_status_does_not_create_the_store(store_path):
+    status = bulk_ingest.store_status(store_path)
+
+    assert status["counts"]["unique_resumes"] == 0
+    assert status["jobs"] == []
+    assert not os.path.exists(store_path)
+
+
+def test_fail_interrupted_jobs(store_path):
+    job_id = bulk_ingest.create_job(store_path, "resumes.zip")
+
+    assert bulk_ingest.fail_interrupted_jobs(store_path) == 1
+    job = bulk_ingest.store_status(store_path)["jobs"][0]
+    assert job["id"] == job_id
+    assert job["status"] == "failed"
+    assert "Interrupted" in job["error"]
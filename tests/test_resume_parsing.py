@@ -0,0 +1,90 @@
+from resume_parsing import detect_changed_sections, split_resume_sections
+
+RESUME = """JOHN DOE
+Software Engineer
+john@example.com
+
+EXPERIENCE
+ACME CORP
+SOFTWARE ENGINEER
+- Built REST APIs in Python
+
+SKILLS
+AWS / GCP
+REST APIS
+
+EDUCATION
+BSc Computer Science, KNUST
+"""
+
+
+def test_split_keys_sections_by_heading():
+    sections = split_resume_sections(RESUME)
+
+    assert sections["contact"] == "JOHN DOE\nSoftware Engineer\njohn@example.com"
+    assert sections["workExperience"] == "ACME CORP\nSOFTWARE ENGINEER\n- Built REST APIs in Python"
+    assert sections["skills"] == "AWS / GCP\nREST APIS"
+    assert sections["education"] == "BSc Computer Science, KNUST"
+
+
+def test_split_keeps_all_caps_entries_in_their_section():
+    sections = split_resume_sections(RESUME)
+
+    assert "other" not in sections
+    assert "ACME CORP" in sections["workExperience"]
+
+
+def test_split_accepts_heading_variants():
+    sections = split_resume_sections("Jane\nProfessional Experience:\nAcme\nTechnical Skills\nGo")
+
+    assert sections["workExperience"] == "Acme"
+    assert sections["skills"] == "Go"
+
+
+def test_split_groups_unmapped_headings_under_other():
+    text = RESUME + "\nVolunteer Work\nRed Cross\nLanguages\nFrench\n"
+    sections = split_resume_sections(text)
+
+    assert sections["other"] == "Red Cross\nFrench"
+    assert sections["education"] == "BSc Computer Science, KNUST"
+
+
+def test_detect_reports_only_edited_section():
+    edited = RESUME.replace("- Built REST APIs in Python", "- Built REST APIs in Python\n- Led a team of 4")
+
+    assert detect_changed_sections(RESUME, edited) == ["workExperience"]
+
+
+def test_detect_edit_to_all_caps_entry_is_localized():
+    edited = RESUME.replace("ACME CORP", "ACME INC")
+
+    assert detect_changed_sections(RESUME, edited) == ["workExperience"]
+
+
+def test_detect_ignores_whitespace_reflow():
+    reflowed = RESUME.replace("Built REST", "Built   REST").replace("\n\n", "\n\n\n")
+
+    assert detect_changed_sections(RESUME, reflowed) == []
+
+
+def test_detect_contact_edit():
+    edited = RESUME.replace("john@example.com", "john.doe@example.com")
+
+    assert detect_changed_sections(RESUME, edited) == ["contact"]
+
+
+def test_detect_added_section():
+    edited = RESUME + "\nProjects\nLiveTrack-Face\n"
+
+    assert detect_changed_sections(RESUME, edited) == ["relevantProjects"]
+
+
+def test_detect_edit_under_unmapped_heading_cannot_be_localized():
+    previous = RESUME + "\nVolunteer Work\nRed Cross\n"
+    edited = RESUME + "\nVolunteer Work\nRed Crescent\n"
+
+    assert detect_changed_sections(previous, edited) is None
+
+
+def test_detect_resume_without_headings_cannot_be_localized():
+    assert detect_changed_sections("John Doe\nPython developer", "John Doe\nGo developer") is None